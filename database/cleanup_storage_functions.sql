@@ -0,0 +1,38 @@
+-- Server-side storage cleanup helpers.
+-- The worker used to list every object in a bucket folder and parse the
+-- timestamps in Python to find the aged ones — O(N) transfer and parsing
+-- per cleanup pass. These functions run the age filter on the database
+-- and return just the aged object names; the worker then deletes exactly
+-- those via the storage API. (Deleting rows from storage.objects in SQL
+-- would only drop the metadata and orphan the underlying files, so the
+-- actual removal must stay with storage.from_().remove().)
+
+create or replace function cleanup_old_junction_frames(p_junction_id int, p_max_age_seconds int)
+returns setof text
+language sql
+security definer
+as $$
+  select name from storage.objects
+  where bucket_id = 'junction-frames'
+    and name like 'junction_' || p_junction_id || '/%'
+    and created_at < now() - make_interval(secs => p_max_age_seconds);
+$$;
+
+create or replace function cleanup_old_violation_images(p_junction_id int, p_max_age_seconds int)
+returns setof text
+language sql
+security definer
+as $$
+  select name from storage.objects
+  where bucket_id = 'violations'
+    and name like 'junction_' || p_junction_id || '/%'
+    and created_at < now() - make_interval(secs => p_max_age_seconds);
+$$;
+
+-- Workers authenticate with the service key; never expose these to anon
+-- (the deletes they feed would let anyone with the public key purge
+-- every junction's frames and violation images).
+revoke execute on function cleanup_old_junction_frames(int, int) from public, anon;
+revoke execute on function cleanup_old_violation_images(int, int) from public, anon;
+grant execute on function cleanup_old_junction_frames(int, int) to authenticated, service_role;
+grant execute on function cleanup_old_violation_images(int, int) to authenticated, service_role;
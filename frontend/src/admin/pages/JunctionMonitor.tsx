@@ -120,7 +120,22 @@ export default function JunctionMonitor() {
                 )
                 .subscribe();
 
-            // Live Feed Subscription (New)
+            // Live frames arrive as Realtime broadcast messages straight
+            // from the worker (base64 JPEG, no Storage round-trip). The
+            // channel carries every junction, so filter on junction_id.
+            const broadcastFeedSub = supabase
+                .channel('junction_live_feed')
+                .on('broadcast', { event: 'frame' },
+                    ({ payload }: any) => {
+                        if (payload && String(payload.junction_id) === id && payload.jpeg_b64) {
+                            setLiveFeedUrl(`data:image/jpeg;base64,${payload.jpeg_b64}`);
+                        }
+                    }
+                )
+                .subscribe();
+
+            // Fallback for workers still on the legacy Storage path,
+            // which updates junctions.live_snapshot_url per frame
             const liveFeedSub = supabase
                 .channel(`monitor-feed-${id}`)
                 .on('postgres_changes', { event: 'UPDATE', schema: 'public', table: 'junctions', filter: `id=eq.${id}` },
@@ -137,6 +152,7 @@ export default function JunctionMonitor() {
                 supabase.removeChannel(trafficSub);
                 supabase.removeChannel(violationSub);
                 supabase.removeChannel(healthSub);
+                supabase.removeChannel(broadcastFeedSub);
                 supabase.removeChannel(liveFeedSub);
             };
         }
@@ -1,52 +1,81 @@
+import numpy as np
+
+
 class TrafficController:
+    # Reason strings indexed by rule code (0=ambulance, 1=high, 2=low, 3=normal)
+    _REASONS = (
+        "Ambulance Detected - Green Corridor Active",
+        "High Density - Extending Green",
+        "Low Density - Minimal Green",
+        "Normal Flow",
+    )
+
     def __init__(self):
         self.standard_green_duration = 30  # seconds
         self.min_green_duration = 10
         self.max_green_duration = 60
         self.ambulance_priority_active = False
 
+        # Lane density is a small integer, so the whole decision collapses
+        # to a table lookup: precompute durations and reason strings for
+        # densities 0..255 plus a reusable ambulance response.
+        codes, durations = self.calculate_signal_durations(
+            np.arange(256), np.zeros(256, dtype=bool))
+        self._duration_lut = durations
+        self._reason_lut = [
+            f"High Density ({d}) - Extending Green" if c == 1 else self._REASONS[c]
+            for d, c in enumerate(codes)]
+        self._amb_response = {
+            "action": "GREEN",
+            "duration": 60,
+            "reason": self._REASONS[0]
+        }
+
+    def calculate_signal_durations(self, densities, ambulance_mask):
+        """
+        Vectorized rule evaluation for N lanes in one call.
+
+        Args:
+            densities: Array-like of vehicle counts, one per lane.
+            ambulance_mask: Array-like of booleans, one per lane.
+
+        Returns:
+            tuple: (rule_codes uint8 array, durations int32 array); map
+            codes through _REASONS for the display string.
+        """
+        dens = np.asarray(densities, dtype=np.int32)
+        amb = np.asarray(ambulance_mask, dtype=bool)
+        high = dens > 15  # Arbitrary threshold for "heavy traffic"
+        low = dens < 5
+        durations = np.where(
+            amb, 60,
+            np.where(high,
+                     np.minimum(self.max_green_duration,
+                                self.standard_green_duration + dens * 2),
+                     np.where(low, self.min_green_duration,
+                              self.standard_green_duration))).astype(np.int32)
+        codes = np.where(amb, 0,
+                         np.where(high, 1, np.where(low, 2, 3))).astype(np.uint8)
+        return codes, durations
+
     def calculate_signal_duration(self, lane_density: int, ambulance_detected: bool) -> dict:
         """
         Rule-based logic for signal control.
-        
+        Single-lane lookup into the precomputed decision table.
+
         Args:
             lane_density: Number of vehicles in the lane.
             ambulance_detected: Boolean, true if an ambulance is in the lane.
-            
+
         Returns:
             dict: {"action": "GREEN" | "RED", "duration": int}
         """
-        
-        # Rule 1: Emergency Priority
         if ambulance_detected:
             self.ambulance_priority_active = True
-            return {
-                "action": "GREEN",
-                "duration": 60,
-                "reason": "Ambulance Detected - Green Corridor Active"
-            }
-        
-        # Rule 2: High Density handling
-        if lane_density > 15:  # Arbitrary threshold for "heavy traffic"
-            # Increase green time
-            duration = min(self.max_green_duration, self.standard_green_duration + (lane_density * 2))
-            return {
-                "action": "GREEN",
-                "duration": duration,
-                "reason": f"High Density ({lane_density}) - Extending Green"
-            }
-            
-        # Rule 3: Low Density
-        if lane_density < 5:
-            return {
-                "action": "GREEN",
-                "duration": self.min_green_duration,
-                "reason": "Low Density - Minimal Green"
-            }
-            
-        # Default
+            return self._amb_response
+        d = min(int(lane_density), 255)
         return {
             "action": "GREEN",
-            "duration": self.standard_green_duration,
-            "reason": "Normal Flow"
+            "duration": int(self._duration_lut[d]),
+            "reason": self._reason_lut[d]
         }
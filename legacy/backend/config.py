@@ -1,16 +1,18 @@
 
-import os
+from pathlib import Path
 
-# Base Directory
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-ASSETS_DIR = os.path.join(BASE_DIR, "assets")
+# Base Directory (resolved once at import; pathlib joins avoid repeated
+# os.path string churn)
+_BASE = Path(__file__).resolve().parent
+BASE_DIR = str(_BASE)
+ASSETS_DIR = str(_BASE / "assets")
 
 # --- USER SETTINGS ---
 
 # 1. Window Display
 # Set to True to see the processing window (consumes more resources)
 # Set to False to run in "Headless" mode (faster, best for server)
-SHOW_GUI = True  
+SHOW_GUI = True
 
 # 2. Video Recording
 # Set to True to save the processed video to 'output_videos/'
@@ -18,13 +20,16 @@ SAVE_VIDEO = True
 
 # 3. Input Source
 # Path to input video file
-VIDEO_PATH = os.path.join(ASSETS_DIR, "Videos", "sample3.mp4")
+VIDEO_PATH = str(_BASE / "assets" / "Videos" / "sample3.mp4")
 
 # 4. Processing Settings
 # Target FPS (approximate)
 TARGET_FPS = 30
 
+# Frames per batched YOLO inference call (amortizes GPU launch overhead)
+BATCH_SIZE = 8
+
 # 5. Output Settings
-OUTPUT_DIR = os.path.join(BASE_DIR, "output_videos")
-if SAVE_VIDEO and not os.path.exists(OUTPUT_DIR):
-    os.makedirs(OUTPUT_DIR)
+OUTPUT_DIR = str(_BASE / "output_videos")
+if SAVE_VIDEO:
+    (_BASE / "output_videos").mkdir(exist_ok=True)
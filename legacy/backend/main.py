@@ -1,5 +1,6 @@
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 import uvicorn
 import sys
 import os
@@ -12,6 +13,14 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from app.core.ai_pipeline import SmartMobilitySystem
 import config  # Import the new config
 
+try:
+    import orjson
+    def _dumps(obj):
+        return orjson.dumps(obj)
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj).encode()
+
 app = FastAPI(title="Smart Mobility System API")
 
 app.add_middleware(
@@ -31,31 +40,140 @@ LP_MODEL = os.path.join(ASSETS_DIR, "license_plate_detector.pt")
 
 print(f"Loading models from: {ASSETS_DIR}")
 
+
+class StreamBroadcaster:
+    """
+    Owns a single SmartMobilitySystem shared by every websocket client.
+    Models load once at first subscribe (no multi-second cold start or
+    duplicate GPU allocation per reconnect); frames are fanned out by
+    reference to per-subscriber queues, dropping the oldest frame for
+    clients that fall behind so one slow client never stalls the rest.
+    """
+
+    def __init__(self):
+        self.system = None
+        self._subscribers = set()
+        self._producer = None
+        self._lock = asyncio.Lock()
+        # Set on every subscribe; tells the pump to send one full stats
+        # frame so a mid-stream client gets a baseline for the deltas
+        self._reset_baseline = False
+
+    async def subscribe(self):
+        q = asyncio.Queue(maxsize=2)
+        async with self._lock:
+            if self.system is None:
+                print("Initializing SmartMobilitySystem...")
+                self.system = SmartMobilitySystem(
+                    video_path=config.VIDEO_PATH, # Use Config
+                    coco_model_path=COCO_MODEL,
+                    lp_model_path=LP_MODEL
+                )
+                print("SmartMobilitySystem Initialized Successfully")
+            # A previous connection may have just left; let its pump wind
+            # down before restarting so we never run two at once.
+            if (self._producer is not None and not self._producer.done()
+                    and self.system._stop_requested):
+                await self._producer
+            self._subscribers.add(q)
+            self._reset_baseline = True
+            if self._producer is None or self._producer.done():
+                self.system.reopen()
+                loop = asyncio.get_running_loop()
+                self._producer = asyncio.create_task(
+                    asyncio.to_thread(self._pump, loop))
+        return q
+
+    async def unsubscribe(self, q):
+        async with self._lock:
+            self._subscribers.discard(q)
+            if not self._subscribers and self.system is not None:
+                # Pause the pipeline; the models stay resident for the
+                # next connection.
+                self.system._stop_requested = True
+
+    def _pump(self, loop):
+        # Only keys whose value changed since the previous frame go over
+        # the wire; the signal sub-dict and plate list rarely change, so
+        # most frames carry a near-empty stats blob. Clients apply the
+        # delta onto their local copy.
+        last_stats = {}
+        try:
+            # Stats and JPEG are fused into one binary message
+            # (4-byte big-endian stats length + stats delta JSON + JPEG).
+            for frame_bytes, stats in self.system.process_stream():
+                # A client that joined mid-stream has no baseline to
+                # apply deltas onto; dropping ours makes the next frame
+                # carry the full stats dict for everyone (a bool write
+                # from the event loop is safe under the GIL).
+                if self._reset_baseline:
+                    self._reset_baseline = False
+                    last_stats = {}
+                delta = {k: v for k, v in stats.items()
+                         if last_stats.get(k) != v}
+                last_stats = stats
+                stats_json = _dumps(delta)
+                payload = len(stats_json).to_bytes(4, 'big') + stats_json + frame_bytes
+                loop.call_soon_threadsafe(self._broadcast, payload)
+        finally:
+            loop.call_soon_threadsafe(self._broadcast, None)
+
+    def _broadcast(self, payload):
+        for q in list(self._subscribers):
+            if q.full():
+                try:
+                    q.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+            q.put_nowait(payload)
+
+
+broadcaster = StreamBroadcaster()
+
+
 @app.get("/")
 def read_root():
     return {"status": "System Operational", "module": "Smart Mobility Nexus"}
 
+@app.get("/stream.mjpg")
+async def mjpeg_stream():
+    """
+    MJPEG video channel: the browser's native <img> decode loop replaces
+    per-frame websocket framing/masking in Python. Viewers should use this
+    for video and keep /ws/stream for the stats JSON.
+    """
+    q = await broadcaster.subscribe()
+
+    async def gen():
+        try:
+            while True:
+                payload = await q.get()
+                if payload is None:
+                    break
+                stats_len = int.from_bytes(payload[:4], 'big')
+                jpeg = payload[4 + stats_len:]
+                yield b"--frame\r\nContent-Type: image/jpeg\r\n\r\n" + jpeg + b"\r\n"
+        finally:
+            await broadcaster.unsubscribe(q)
+
+    return StreamingResponse(gen(), media_type="multipart/x-mixed-replace; boundary=frame")
+
 @app.websocket("/ws/stream")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
     print("WebSocket Connected")
-    
+
     try:
-        # Initialize System for this connection
-        print("Initializing SmartMobilitySystem...")
-        system = SmartMobilitySystem(
-            video_path=config.VIDEO_PATH, # Use Config
-            coco_model_path=COCO_MODEL,
-            lp_model_path=LP_MODEL
-        )
-        print("SmartMobilitySystem Initialized Successfully")
-
-        # Loop through frames
-        for frame_bytes, stats in system.process_stream():
-            await websocket.send_json(stats)
-            await websocket.send_bytes(frame_bytes)
-            await asyncio.sleep(0.05) 
-            
+        q = await broadcaster.subscribe()
+        try:
+            while True:
+                payload = await q.get()
+                if payload is None:
+                    break
+                await websocket.send_bytes(payload)
+        finally:
+            await broadcaster.unsubscribe(q)
+
     except WebSocketDisconnect:
         print("Client disconnected")
     except Exception as e:
@@ -65,4 +183,16 @@ async def websocket_endpoint(websocket: WebSocket):
         await websocket.close()
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    # Prefer uvloop/httptools when installed (2-4x asyncio throughput);
+    # both are unavailable on Windows, so fall back to the defaults.
+    try:
+        import uvloop  # noqa: F401
+        loop_impl, http_impl = "uvloop", "httptools"
+    except ImportError:
+        loop_impl, http_impl = "asyncio", "auto"
+    # Frames are already JPEG-compressed; permessage-deflate would only
+    # burn CPU re-compressing them. reload=True is dropped: the reloader
+    # forks a watcher process and defeats the uvloop fast path.
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=False,
+                loop=loop_impl, http=http_impl, ws="websockets",
+                ws_per_message_deflate=False)
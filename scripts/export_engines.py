@@ -0,0 +1,132 @@
+"""
+One-time export of the YOLO .pt weights to TensorRT engines.
+
+Run this once on the deployment machine (engines are GPU-specific).
+The worker and backend prefer the .engine files when they exist and
+fall back to the .pt weights otherwise.
+
+FP16 is the default. Pass --int8 to additionally run post-training
+quantization: representative frames are dumped from the configured
+sample video into calib/ and Ultralytics runs entropy calibration over
+them, producing *_int8.engine files which the loaders prefer. Spot-check
+detection quality after an INT8 export before trusting it in production.
+"""
+import argparse
+import glob
+import os
+import shutil
+import sys
+
+import cv2
+import torch
+from ultralytics import YOLO
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODEL_PATHS = [
+    os.path.join(BASE_DIR, "worker", "assets", "yolov8n.pt"),
+    os.path.join(BASE_DIR, "worker", "assets", "license_plate_detector.pt"),
+    os.path.join(BASE_DIR, "legacy", "backend", "assets", "yolov8n.pt"),
+    os.path.join(BASE_DIR, "legacy", "backend", "assets", "license_plate_detector.pt"),
+]
+
+CALIB_DIR = os.path.join(BASE_DIR, "calib")
+
+
+def dump_calibration_frames(max_frames=500):
+    """Sample frames evenly from the bundled videos into calib/images/."""
+    videos = (glob.glob(os.path.join(BASE_DIR, "worker", "Videos", "*.mp4")) +
+              glob.glob(os.path.join(BASE_DIR, "legacy", "backend", "assets", "Videos", "*.mp4")))
+    if not videos:
+        print("No sample videos found for calibration.")
+        return None
+
+    images_dir = os.path.join(CALIB_DIR, "images")
+    os.makedirs(images_dir, exist_ok=True)
+    per_video = max(1, max_frames // len(videos))
+    dumped = 0
+    for video in videos:
+        cap = cv2.VideoCapture(video)
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or per_video
+        step = max(1, total // per_video)
+        idx = 0
+        while dumped < max_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if idx % step == 0:
+                cv2.imwrite(os.path.join(images_dir, f"calib_{dumped:05d}.jpg"), frame)
+                dumped += 1
+            idx += 1
+        cap.release()
+    print(f"Dumped {dumped} calibration frames to {images_dir}")
+
+    # Minimal dataset yaml; only the image folder matters for calibration
+    yaml_path = os.path.join(CALIB_DIR, "calib.yaml")
+    with open(yaml_path, "w") as f:
+        f.write(f"path: {CALIB_DIR}\ntrain: images\nval: images\nnames:\n  0: object\n")
+    return yaml_path
+
+
+def export_model(pt_path, int8=False, calib_yaml=None):
+    suffix = "_int8.engine" if int8 else ".engine"
+    engine_path = os.path.splitext(pt_path)[0] + suffix
+    if os.path.exists(engine_path):
+        print(f"Already exported: {engine_path}")
+        return
+    print(f"Exporting {pt_path} -> {engine_path} ...")
+    try:
+        if int8:
+            # Ultralytics always writes <stem>.engine next to the weights,
+            # which would overwrite the FP16 engine built above. Export
+            # from a temporary copy of the .pt so the INT8 build lands at
+            # <stem>_int8.engine directly and both engines stay side by side.
+            tmp_pt = os.path.splitext(pt_path)[0] + "_int8.pt"
+            shutil.copyfile(pt_path, tmp_pt)
+            try:
+                YOLO(tmp_pt).export(
+                    format="engine", imgsz=640, int8=True,
+                    data=calib_yaml, batch=16, workspace=4,
+                )
+            finally:
+                os.remove(tmp_pt)
+        else:
+            YOLO(pt_path).export(
+                format="engine", imgsz=640, half=True,
+                dynamic=True, batch=16, workspace=4,
+            )
+        print(f"Done: {engine_path}")
+    except Exception as e:
+        print(f"Export failed for {pt_path}: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--int8", action="store_true",
+                        help="also build INT8 engines with PTQ calibration")
+    parser.add_argument("--frames", type=int, default=500,
+                        help="calibration frames to sample (with --int8)")
+    args = parser.parse_args()
+
+    if not torch.cuda.is_available():
+        print("CUDA not available - TensorRT export requires an NVIDIA GPU.")
+        sys.exit(1)
+
+    calib_yaml = None
+    if args.int8:
+        calib_yaml = dump_calibration_frames(args.frames)
+        if calib_yaml is None:
+            print("Skipping INT8: no calibration data.")
+            args.int8 = False
+
+    for pt_path in MODEL_PATHS:
+        if not os.path.exists(pt_path):
+            print(f"Skipping (not found): {pt_path}")
+            continue
+        export_model(pt_path)
+        if args.int8:
+            export_model(pt_path, int8=True, calib_yaml=calib_yaml)
+
+
+if __name__ == "__main__":
+    main()
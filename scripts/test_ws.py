@@ -8,11 +8,13 @@ async def test_connection():
     try:
         async with websockets.connect(uri) as websocket:
             print("Connected! Waiting for data...")
+            stats = {}  # server sends deltas; apply onto a local copy
             for i in range(5): # Get 5 frames
-                msg_stats = await websocket.recv() # JSON stats
-                msg_frame = await websocket.recv() # Binary frame
-                
-                stats = json.loads(msg_stats)
+                # Fused binary message: 4-byte stats length + stats delta JSON + JPEG
+                payload = await websocket.recv()
+                stats_len = int.from_bytes(payload[:4], 'big')
+                stats.update(json.loads(payload[4:4 + stats_len]))
+                msg_frame = payload[4 + stats_len:]
                 print(f"\n--- Frame {i+1} Stats ---")
                 print(f"Density: {stats.get('density')}")
                 print(f"Signal: {stats.get('signal')}")
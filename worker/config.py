@@ -1,9 +1,13 @@
-import os
+from pathlib import Path
 
 # ==========================================
 # WORKER CONFIGURATION
 # ==========================================
 
+# Resolved once at import; pathlib joins avoid repeated os.path churn
+_BASE = Path(__file__).resolve().parent
+BASE_DIR = str(_BASE)
+
 # 1. Identity
 JUNCTION_ID = 4  # UPDATED
 LOCATION_NAME = "Secritari area" # UPDATED
@@ -17,20 +21,33 @@ LONGITUDE = 80.51599164231466
 # 2. Input
 # Path to video file OR RTSP Stream URL
 # Example: "rtsp://username:password@ip:port/stream"
-VIDEO_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Videos", "sample.mp4")
+VIDEO_SOURCE = str(_BASE / "Videos" / "sample.mp4")
 
 # 3. Models
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-COCO_MODEL_PATH = os.path.join(BASE_DIR, "assets", "yolov8n.pt")
-LP_MODEL_PATH = os.path.join(BASE_DIR, "assets", "license_plate_detector.pt")
+
+def _prefer_engine(pt_path):
+    """
+    Use a TensorRT engine (see scripts/export_engines.py) if present.
+    INT8 beats FP16 beats the .pt checkpoint.
+    """
+    for candidate in (pt_path.with_name(pt_path.stem + "_int8.engine"),
+                      pt_path.with_suffix(".engine")):
+        if candidate.exists():
+            return str(candidate)
+    return str(pt_path)
+
+COCO_MODEL_PATH = _prefer_engine(_BASE / "assets" / "yolov8n.pt")
+LP_MODEL_PATH = _prefer_engine(_BASE / "assets" / "license_plate_detector.pt")
 
 # 4. Output Behavior
 SHOW_GUI = True         # Set to True to see the window, False for headless mode
 SAVE_VIDEO = False      # UPDATED
-OUTPUT_DIR = os.path.join(BASE_DIR, "processed_output")
+OUTPUT_DIR = str(_BASE / "processed_output")
 
 # 5. Processing / Tuning
 LOG_INTERVAL = 5.0      # Seconds between DB syncs
+TARGET_FPS = 0          # Analyze at this rate, skipping decode of the rest (0 = every frame)
+SNAPSHOT_INTERVAL = 5.0 # Seconds between live frame snapshot uploads
 CONFIDENCE_THRESHOLD = 0.5
 
 # Speed Estimation Calibration
@@ -38,5 +55,5 @@ SPEED_CALCULATION_FPS = 10  # UPDATED
 PIXELS_PER_METER = 50       # How many pixels represent 1 meter (Calibrate this per camera view!)
 
 # Ensure output directory exists
-if SAVE_VIDEO and not os.path.exists(OUTPUT_DIR):
-    os.makedirs(OUTPUT_DIR)
+if SAVE_VIDEO:
+    (_BASE / "processed_output").mkdir(exist_ok=True)
@@ -0,0 +1,68 @@
+import threading
+
+import torch
+
+from .processor import JunctionProcessor
+
+
+class JunctionPool:
+    """
+    Runs several junction processors inside one worker process.
+
+    The YOLO models and the EasyOCR reader are loaded once and shared by
+    every junction (one copy in GPU memory instead of N). Ultralytics
+    predictors and EasyOCR readers keep per-call state on the model
+    object, so calls into the same model are not thread-safe: each shared
+    model carries a lock and junctions take it for the duration of a
+    forward pass. Per-thread CUDA streams still let *different* models
+    overlap on the device (junction A's detector alongside junction B's
+    OCR), but calls into one model serialize.
+    """
+
+    def __init__(self, junction_specs, coco_model_path, lp_model_path,
+                 config_module=None, logger=None):
+        """
+        junction_specs: list of (junction_id, video_source) tuples.
+        """
+        self.logger = logger
+        self.processors = []
+        self._threads = []
+        # One lock per shared model (coco, lp, ocr); handed to every
+        # processor, including the one that loads the weights
+        model_locks = (threading.Lock(), threading.Lock(), threading.Lock())
+        shared = None
+        for junction_id, video_source in junction_specs:
+            proc = JunctionProcessor(
+                junction_id=junction_id,
+                video_source=video_source,
+                coco_model_path=coco_model_path,
+                lp_model_path=lp_model_path,
+                config_module=config_module,
+                logger=logger,
+                shared_models=shared,
+                model_locks=model_locks,
+            )
+            if shared is None:
+                shared = (proc.coco_model, proc.lp_model, proc.reader)
+            self.processors.append(proc)
+
+    def _run(self, proc):
+        if torch.cuda.is_available():
+            stream = torch.cuda.Stream()
+            with torch.cuda.stream(stream):
+                proc.start()
+        else:
+            proc.start()
+
+    def start(self):
+        for proc in self.processors:
+            t = threading.Thread(target=self._run, args=(proc,),
+                                 name=f"junction-{proc.junction_id}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        for t in self._threads:
+            t.join()
+
+    def stop(self):
+        for proc in self.processors:
+            proc.stop()
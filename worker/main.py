@@ -5,10 +5,19 @@ import sys
 # Add worker root to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+# FFmpeg decode options must be in the environment before any
+# cv2.VideoCapture is created: multi-threaded slice decode (the backend
+# defaults to one thread) and no input buffering for live sources.
+# _open_capture appends its own video_codec option on CUDA hosts.
+os.environ.setdefault("OPENCV_FFMPEG_CAPTURE_OPTIONS",
+                      f"threads;{os.cpu_count() or 1}|fflags;nobuffer")
+os.environ.setdefault("OPENCV_FFMPEG_DEBUG", "0")
+
 from core.processor import JunctionProcessor
+from core.junction_pool import JunctionPool
 from services.supabase_client import SupabaseService
 from utils.env_validator import validate_startup, ValidationError
-from utils.logger import WorkerLogger
+from utils.logger import WorkerLogger, bind_logger
 from utils.error_handler import ErrorHandler
 
 import config  # Import local config
@@ -29,7 +38,11 @@ def main():
     parser.add_argument("--coco_model", type=str, default=config.COCO_MODEL_PATH, help="Path to YOLOv8 COCO model")
     parser.add_argument("--lp_model", type=str, default=config.LP_MODEL_PATH, help="Path to License Plate model")
     parser.add_argument("--log_level", type=str, default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"], help="Logging level")
+    parser.add_argument("--target_fps", type=float, help=f"Analysis rate; unsampled frames skip decode via grab() (Default: {config.TARGET_FPS})")
 
+    parser.add_argument("--junctions", type=str,
+                        help="Run several junctions in one process sharing the GPU, "
+                             "e.g. --junctions \"1:rtsp://cam1,2:videos/j2.mp4\"")
     parser.add_argument("--no-gui", action="store_true", help="Disable GUI window")
     parser.add_argument("--save", action="store_true", help="Enable video saving")
     
@@ -42,6 +55,9 @@ def main():
     if args.source:
         config.VIDEO_SOURCE = args.source
         
+    if args.target_fps:
+        config.TARGET_FPS = args.target_fps
+
     if args.no_gui:
         config.SHOW_GUI = False
         
@@ -53,6 +69,8 @@ def main():
         junction_id=config.JUNCTION_ID,
         log_level=args.log_level
     )
+    # Point the module-level log helpers straight at this logger
+    bind_logger(logger)
     
     logger.info("="*60)
     logger.info(f"Starting Worker for Junction {config.JUNCTION_ID}")
@@ -75,17 +93,31 @@ def main():
     if not os.path.exists(args.lp_model):
         logger.warning(f"LP Model not found at {args.lp_model}. Plate detection may fail.")
 
-    # 5. Start Processor
+    # 5. Start Processor (or a pool of them sharing the loaded models)
     try:
-        logger.info("Initializing Junction Processor...")
-        processor = JunctionProcessor(
-            junction_id=config.JUNCTION_ID,
-            video_source=config.VIDEO_SOURCE,
-            coco_model_path=args.coco_model,
-            lp_model_path=args.lp_model,
-            config_module=config,  # Pass the config object
-            logger=logger  # Pass logger to processor
-        )
+        if args.junctions:
+            specs = []
+            for spec in args.junctions.split(","):
+                junction_id, _, source = spec.partition(":")
+                specs.append((int(junction_id), source))
+            logger.info(f"Initializing Junction Pool ({len(specs)} junctions)...")
+            processor = JunctionPool(
+                junction_specs=specs,
+                coco_model_path=args.coco_model,
+                lp_model_path=args.lp_model,
+                config_module=config,
+                logger=logger
+            )
+        else:
+            logger.info("Initializing Junction Processor...")
+            processor = JunctionProcessor(
+                junction_id=config.JUNCTION_ID,
+                video_source=config.VIDEO_SOURCE,
+                coco_model_path=args.coco_model,
+                lp_model_path=args.lp_model,
+                config_module=config,  # Pass the config object
+                logger=logger  # Pass logger to processor
+            )
         logger.info("Starting video processing loop...")
         processor.start()
     except KeyboardInterrupt:
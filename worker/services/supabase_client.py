@@ -1,24 +1,206 @@
+import asyncio
+import base64
 import os
+import re
 import time
-import cv2
-from supabase import create_client, Client
-from dotenv import load_dotenv
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-# Load env variables from worker root
-load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
+# libjpeg-turbo encodes with SIMD Huffman (3-5x faster than OpenCV's
+# bundled libjpeg at the same quality); fall back to cv2 when absent
+try:
+    from turbojpeg import TurboJPEG, TJSAMP_420
+    _TURBOJPEG = TurboJPEG()
+except Exception:
+    _TURBOJPEG = None
+
+# Violation filenames start YYYYMMDD_HHMMSS_; one compiled match beats
+# two str.split allocations plus a ~20 us strptime per file
+_VIOL_TS_RE = re.compile(r"(\d{4})(\d{2})(\d{2})_(\d{2})(\d{2})(\d{2})_")
+
+# imencode parameter tuples, built once per quality on first use
+# (cv2 loads lazily, so these can't be module constants)
+_JPEG_PARAMS = {}
+
+# ISO timestamp cached at 1 s resolution: heartbeat-rate callers don't
+# need finer, and it skips a datetime build + isoformat per call
+_last_iso_ts = [0.0, ""]
+
+def _now_iso():
+    t = time.time()
+    if t - _last_iso_ts[0] > 1.0:
+        _last_iso_ts[:] = [t, datetime.fromtimestamp(t).isoformat()]
+    return _last_iso_ts[1]
 
 class SupabaseService:
+    # .env is loaded on first instantiation, not module import, so
+    # importing this module for its helpers stays side-effect free
+    _env_loaded = False
+
     def __init__(self):
+        # supabase (and its httpx/postgrest tree) loads lazily too —
+        # only processes that actually talk to the DB pay the import
+        from supabase import create_client
+
+        if not SupabaseService._env_loaded:
+            from dotenv import load_dotenv
+            load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
+            SupabaseService._env_loaded = True
+
         url: str = os.environ.get("SUPABASE_URL")
         key: str = os.environ.get("SUPABASE_KEY")
-        
+
         if not url or not key:
             raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in .env")
-            
-        self.supabase: Client = create_client(url, key)
+
+        self.supabase = create_client(url, key)
+
+        # Keep warm HTTPS connections to Supabase: the default httpx
+        # pool is small, and a cold TLS handshake costs 20-50 ms — on
+        # par with the requests themselves at our 1-5 req/s. Swap in a
+        # client with a bigger keep-alive pool (HTTP/2 when the h2
+        # extra is installed). Internals differ across supabase-py
+        # releases, so this is strictly best-effort.
+        try:
+            import httpx
+            limits = httpx.Limits(max_keepalive_connections=16,
+                                  max_connections=32,
+                                  keepalive_expiry=120)
+
+            def _tuned(session):
+                try:
+                    return httpx.Client(base_url=session.base_url,
+                                        headers=session.headers,
+                                        limits=limits, timeout=10.0,
+                                        http2=True)
+                except ImportError:
+                    return httpx.Client(base_url=session.base_url,
+                                        headers=session.headers,
+                                        limits=limits, timeout=10.0)
+
+            for api in (self.supabase.postgrest, self.supabase.storage):
+                if isinstance(getattr(api, "session", None), httpx.Client):
+                    api.session = _tuned(api.session)
+                elif isinstance(getattr(api, "_client", None), httpx.Client):
+                    api._client = _tuned(api._client)
+        except Exception as e:
+            print(f"DEBUG: httpx pool tuning skipped: {e}")
+
+        # Insert-only tables are buffered and flushed as one multi-row
+        # insert (PostgREST accepts arrays), collapsing N round-trips to 1.
+        # A flush fires when a buffer fills or FLUSH_INTERVAL has passed,
+        # so dashboard staleness stays bounded. The timestamp is
+        # per-table: busy traffic_logs flushes must not keep resetting
+        # the clock on sparse worker_health rows (heartbeats would only
+        # go out on a full buffer, minutes late).
+        now = time.time()
+        self._insert_buf = {"traffic_logs": [], "worker_health": []}
+        self._buf_lock = threading.Lock()
+        self._last_flush = {t: now for t in self._insert_buf}
+
+        # Snapshot target size per source resolution; camera dims never
+        # change mid-run so this is computed once
+        self._snap_dims = {}
+
+        # Small pool so simultaneous violation images upload in
+        # parallel instead of serializing on one connection; the PUTs
+        # multiplex over the tuned keep-alive pool above
+        self._upload_pool = ThreadPoolExecutor(
+            max_workers=4, thread_name_prefix="sb-upload")
+
+        # Filenames we uploaded this run, per junction, in upload order.
+        # Lets the non-RPC cleanup delete O(aged) files instead of
+        # listing the whole folder every pass
+        self._snapshot_history = {}
+
+        # Live frames go out as a single Realtime broadcast message
+        # (base64 JPEG) instead of Storage upload + junctions UPDATE.
+        # Broadcast send is async-only in older supabase-py releases,
+        # so probe for a sync entry point and fall back to the legacy
+        # path when it is missing.
+        self._channel = None
+        try:
+            ch = self.supabase.channel("junction_live_feed")
+            if (hasattr(ch, "send_broadcast")
+                    and not asyncio.iscoroutinefunction(ch.send_broadcast)):
+                ch.subscribe()
+                self._channel = ch
+        except Exception:
+            self._channel = None
+
+        # Storage keeps an archival copy at most once a minute when
+        # PERSIST_SNAPSHOTS is set; broadcast covers the live view
+        self._persist_snapshots = os.environ.get(
+            "PERSIST_SNAPSHOTS", "false").lower() in ("1", "true", "yes")
+        self._last_persist = 0.0
+
         print("DEBUG: Supabase Client Initialized")
 
+    # Max rows buffered per table / max seconds between flushes
+    BATCH_SIZE = 20
+    FLUSH_INTERVAL = 5.0
+    # Seconds between archival Storage snapshots (PERSIST_SNAPSHOTS)
+    PERSIST_EVERY = 60.0
+
+    def _buffered_insert(self, table: str, row: dict):
+        """Append a row to the table's buffer, flushing buffers as due.
+
+        Every table's own deadline is checked on every insert, so a
+        quiet table still flushes within FLUSH_INTERVAL of its row
+        arriving as long as any other table keeps inserting.
+        """
+        pending = {}
+        with self._buf_lock:
+            self._insert_buf[table].append(row)
+            now = time.time()
+            for t, rows in self._insert_buf.items():
+                if not rows:
+                    continue
+                if (len(rows) >= self.BATCH_SIZE
+                        or now - self._last_flush[t] >= self.FLUSH_INTERVAL):
+                    pending[t] = rows
+                    self._insert_buf[t] = []
+                    self._last_flush[t] = now
+        for t, rows in pending.items():
+            try:
+                self.supabase.table(t).insert(rows).execute()
+            except Exception as e:
+                print(f"ERROR: Failed to flush {t} batch: {e}")
+
+    def flush(self):
+        """Push all buffered rows immediately (call before shutdown)."""
+        with self._buf_lock:
+            pending = {t: rows for t, rows in self._insert_buf.items() if rows}
+            now = time.time()
+            for t in pending:
+                self._insert_buf[t] = []
+                self._last_flush[t] = now
+        for table, rows in pending.items():
+            try:
+                self.supabase.table(table).insert(rows).execute()
+            except Exception as e:
+                print(f"ERROR: Failed to flush {table} batch: {e}")
+
+    def _encode_jpeg(self, frame, quality: int) -> bytes:
+        """JPEG-encode a BGR frame with turbojpeg when available."""
+        if _TURBOJPEG is not None:
+            return _TURBOJPEG.encode(frame, quality=quality,
+                                     jpeg_subsample=TJSAMP_420)
+        import cv2  # deferred: free after first use, worker has it loaded anyway
+        params = _JPEG_PARAMS.get(quality)
+        if params is None:
+            # Optimized Huffman tables + progressive scan: ~15% smaller
+            # bodies at the same quality, and upload bandwidth is the
+            # bottleneck for 1/s snapshots
+            params = _JPEG_PARAMS[quality] = (
+                cv2.IMWRITE_JPEG_QUALITY, quality,
+                cv2.IMWRITE_JPEG_OPTIMIZE, 1,
+                cv2.IMWRITE_JPEG_PROGRESSIVE, 1)
+        _, buffer = cv2.imencode('.jpg', frame, params)
+        return buffer.tobytes()
+
     def get_junction_config(self, junction_id: int):
         """Fetches junction details to ensure it exists and gets video source if needed."""
         try:
@@ -38,10 +220,7 @@ class SupabaseService:
             "congestion_level": congestion_level,
             "avg_speed": avg_speed
         }
-        try:
-            self.supabase.table("traffic_logs").insert(data).execute()
-        except Exception as e:
-            print(f"ERROR: Failed to log traffic data: {e}")
+        self._buffered_insert("traffic_logs", data)
 
     def log_violation(self, junction_id: int, violation_type: str, image_path: str = None):
         """
@@ -91,6 +270,22 @@ class SupabaseService:
             traceback.print_exc()
             return None
 
+    def log_violation_enhanced_batch(self, rows: list):
+        """
+        Insert many violation rows in one round-trip. Use when no image
+        upload needs the returned ids; log_violation_enhanced stays
+        per-row because its id feeds upload_violation_image.
+        Returns the list of inserted ids (empty on failure).
+        """
+        if not rows:
+            return []
+        try:
+            response = self.supabase.table("violations").insert(rows).execute()
+            return [r['id'] for r in (response.data or [])]
+        except Exception as e:
+            print(f"ERROR: Failed to log violation batch: {e}")
+            return []
+
     def upload_violation_image(self, image_array, junction_id: int, violation_id: int):
         """
         Upload violation image to Supabase Storage
@@ -98,8 +293,7 @@ class SupabaseService:
         """
         try:
             # Convert to JPEG bytes
-            _, buffer = cv2.imencode('.jpg', image_array, [cv2.IMWRITE_JPEG_QUALITY, 85])
-            image_bytes = buffer.tobytes()
+            image_bytes = self._encode_jpeg(image_array, quality=85)
             
             # Generate filename
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -130,6 +324,12 @@ class SupabaseService:
             traceback.print_exc()
             return None
 
+    def upload_violation_image_async(self, image_array, junction_id: int, violation_id: int):
+        """Fire-and-forget upload_violation_image on the upload pool, so
+        several violations in the same second upload concurrently."""
+        self._upload_pool.submit(
+            self.upload_violation_image, image_array, junction_id, violation_id)
+
     def log_emergency_vehicle(self, junction_id: int, vehicle_type: str = 'ambulance',
                               direction: str = 'unknown', estimated_speed: float = None):
         """
@@ -141,8 +341,8 @@ class SupabaseService:
             "vehicle_type": vehicle_type,
             "direction": direction,
             "estimated_speed": estimated_speed,
-            "detected_at": datetime.now().isoformat(),
-            "last_seen_at": datetime.now().isoformat(),
+            "detected_at": _now_iso(),
+            "last_seen_at": _now_iso(),
             "status": "active",
             "priority_level": 1
         }
@@ -163,7 +363,7 @@ class SupabaseService:
         """Update last seen timestamp for active active emergency vehicle"""
         try:
             self.supabase.table("emergency_vehicles")\
-                .update({"last_seen_at": datetime.now().isoformat()})\
+                .update({"last_seen_at": _now_iso()})\
                 .eq("id", emergency_id)\
                 .execute()
         except Exception as e:
@@ -181,27 +381,18 @@ class SupabaseService:
             "cpu_usage": cpu_usage,
             "memory_usage": memory_usage,
             "avg_detection_confidence": avg_detection_confidence,
-            "avg_detection_confidence": avg_detection_confidence,
             "total_detections": total_detections,
             "status": status,
-            "last_heartbeat": datetime.now().isoformat()
+            "last_heartbeat": _now_iso()
         }
-        
-        try:
-            self.supabase.table("worker_health").insert(data).execute()
-            # Only print occasionally to avoid spam
-            if total_detections % 100 == 0:
-                print(f"DEBUG: Worker health logged - FPS: {fps:.1f}, CPU: {cpu_usage:.1f}%, Detections: {total_detections}")
-        except Exception as e:
-            print(f"ERROR: Failed to log worker health: {e}")
+
+        self._buffered_insert("worker_health", data)
 
     def update_junction_info(self, junction_id: int, name: str, latitude: float, longitude: float, video_source: str = None, fps: int = 30, ppm: int = 50):
         """Updates the junction's static info (name, lat, long) on startup."""
         try:
-            # Check if exists first
-            res = self.supabase.table("junctions").select("id").eq("id", junction_id).execute()
-            
             data = {
+                "id": junction_id,
                 "name": name,
                 "latitude": latitude,
                 "longitude": longitude,
@@ -210,22 +401,16 @@ class SupabaseService:
                 "ppm": int(ppm),
                 "status": "active"
             }
-            
-            print(f"DEBUG: Attempting to update Junction {junction_id} with data: {data}")
-            
-            if res.data:
-                # Update
-                update_response = self.supabase.table("junctions").update(data).eq("id", junction_id).execute()
-                print(f"DEBUG: Update response: {update_response}")
-                print(f"DEBUG: Updated Junction {junction_id} info: {name} @ {latitude}, {longitude}")
-            else:
-                # Insert (Optional, if we want auto-registered)
-                data["id"] = junction_id
-                # video_source is already in data
-                insert_response = self.supabase.table("junctions").insert(data).execute()
-                print(f"DEBUG: Insert response: {insert_response}")
-                print(f"DEBUG: Registered New Junction {junction_id}")
-                
+
+            print(f"DEBUG: Attempting to upsert Junction {junction_id} with data: {data}")
+
+            # One round-trip: INSERT ... ON CONFLICT (id) DO UPDATE
+            # replaces the old SELECT-then-UPDATE/INSERT dance and still
+            # auto-registers new junctions
+            response = self.supabase.table("junctions").upsert(data, on_conflict="id").execute()
+            print(f"DEBUG: Upsert response: {response}")
+            print(f"DEBUG: Synced Junction {junction_id} info: {name} @ {latitude}, {longitude}")
+
         except Exception as e:
             print(f"ERROR: Failed to update junction info: {e}")
             import traceback
@@ -241,20 +426,46 @@ class SupabaseService:
 
     def upload_frame_snapshot(self, frame, junction_id: int):
         """
-        Uploads a frame snapshot to 'junction-frames' bucket.
-        Returns the public URL.
+        Pushes the live frame to dashboards. Preferred path is one
+        Realtime broadcast message carrying the JPEG as base64; the
+        Storage upload + junctions UPDATE path (three round-trips per
+        frame) runs only when broadcast is unavailable, or once every
+        PERSIST_EVERY seconds for archival when PERSIST_SNAPSHOTS is
+        set. Returns the public URL when Storage was written.
         """
         try:
-            # Resize for bandwidth optimization (e.g. 640x360)
+            import cv2  # deferred; see _encode_jpeg
+            # Resize for bandwidth optimization (e.g. 640x360).
+            # INTER_AREA box-filters on the way down: faster and cleaner
+            # than the default bilinear for 1080p->360p class shrinks.
             h, w = frame.shape[:2]
-            scale = min(640/w, 360/h)
-            if scale < 1:
-                frame = cv2.resize(frame, (0,0), fx=scale, fy=scale)
+            dims = self._snap_dims.get((w, h))
+            if dims is None:
+                scale = min(640/w, 360/h)
+                # A near-1.0 scale isn't worth a full-frame pass
+                dims = (int(w*scale), int(h*scale)) if scale < 0.98 else ()
+                self._snap_dims[(w, h)] = dims
+            if dims:
+                frame = cv2.resize(frame, dims, interpolation=cv2.INTER_AREA)
             
             # Encode to JPEG
-            _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 60])
-            image_bytes = buffer.tobytes()
-            
+            image_bytes = self._encode_jpeg(frame, quality=60)
+
+            if self._channel is not None:
+                try:
+                    self._channel.send_broadcast("frame", {
+                        "junction_id": junction_id,
+                        "jpeg_b64": base64.b64encode(image_bytes).decode(),
+                        "timestamp": _now_iso(),
+                    })
+                    due_archive = (self._persist_snapshots and
+                                   time.time() - self._last_persist >= self.PERSIST_EVERY)
+                    if not due_archive:
+                        return None
+                except Exception:
+                    # Socket died; drop to the legacy path for good
+                    self._channel = None
+
             # Timestamp filename
             timestamp = int(time.time())
             filename = f"junction_{junction_id}/{timestamp}.jpg"
@@ -271,7 +482,10 @@ class SupabaseService:
             
             # Broadcast the new frame URL via Realtime
             self.broadcast_frame_update(junction_id, public_url)
-            
+
+            self._last_persist = time.time()
+            self._snapshot_history.setdefault(junction_id, deque()).append(
+                (time.time(), filename))
             return public_url
             
         except Exception as e:
@@ -286,7 +500,7 @@ class SupabaseService:
             payload = {
                 "junction_id": junction_id,
                 "image_url": image_url,
-                "timestamp": datetime.now().isoformat()
+                "timestamp": _now_iso()
             }
             # We can't directly broadcast via python client easily without being admin or using a workaround.
             # Workaround: Update a 'live_feeds' table or just rely on the dashboard pulling it?
@@ -308,8 +522,49 @@ class SupabaseService:
 
     def cleanup_old_snapshots(self, junction_id: int, max_age_seconds: int = 600):
         """
-        Deletes snapshots older than max_age_seconds.
+        Deletes snapshots older than max_age_seconds. Prefers the
+        cleanup_old_junction_frames RPC (see
+        database/cleanup_storage_functions.sql) which runs the age filter
+        server-side and returns just the aged names — the delete itself
+        must go through the storage API or the files would be orphaned.
+        Falls back to the client-side list-and-remove when the function
+        isn't deployed.
         """
+        try:
+            res = self.supabase.rpc('cleanup_old_junction_frames', {
+                'p_junction_id': junction_id,
+                'p_max_age_seconds': max_age_seconds,
+            }).execute()
+        except Exception:
+            pass  # RPC not deployed; fall through to client-side path
+        else:
+            names = res.data or []
+            if names:
+                try:
+                    self.supabase.storage.from_("junction-frames").remove(names)
+                    print(f"DEBUG: Cleaned up {len(names)} old snapshots for Junction {junction_id}")
+                except Exception as e:
+                    print(f"ERROR: Cleanup failed: {e}")
+            return
+
+        # Filenames tracked at upload time: pop aged entries off the
+        # left of the deque — O(deleted), no folder listing
+        hist = self._snapshot_history.get(junction_id)
+        if hist:
+            now = time.time()
+            to_remove = []
+            while hist and now - hist[0][0] > max_age_seconds:
+                to_remove.append(hist.popleft()[1])
+            if to_remove:
+                try:
+                    self.supabase.storage.from_("junction-frames").remove(to_remove)
+                    print(f"DEBUG: Cleaned up {len(to_remove)} old snapshots for Junction {junction_id}")
+                except Exception as e:
+                    print(f"ERROR: Cleanup failed: {e}")
+            return
+
+        # Nothing tracked yet (fresh start): list the folder once to
+        # clear files left over from a previous run
         try:
             # List files
             folder = f"junction_{junction_id}"
@@ -339,7 +594,26 @@ class SupabaseService:
         """
         Deletes violation images older than max_age_seconds (default 1 day).
         This assumes violation images are stored in 'violations' bucket with a timestamp in the name.
+        Prefers the cleanup_old_violation_images RPC for the server-side
+        age filter (the returned names are removed via the storage API);
+        falls back to list-and-remove when it isn't deployed.
         """
+        try:
+            res = self.supabase.rpc('cleanup_old_violation_images', {
+                'p_junction_id': junction_id,
+                'p_max_age_seconds': max_age_seconds,
+            }).execute()
+        except Exception:
+            pass  # RPC not deployed; fall through to client-side path
+        else:
+            names = res.data or []
+            if names:
+                try:
+                    self.supabase.storage.from_("violations").remove(names)
+                    print(f"DEBUG: Cleaned up {len(names)} old violation images for Junction {junction_id}")
+                except Exception as e:
+                    print(f"ERROR: Violation cleanup failed: {e}")
+            return
         try:
             # List files
             folder = f"junction_{junction_id}"
@@ -352,16 +626,16 @@ class SupabaseService:
                 try:
                     name = f['name']
                     # Name format: YYYYMMDD_HHMMSS_ID.jpg
-                    # Parse timestamp from name
-                    date_part = name.split('_')[0] + name.split('_')[1] # YYYYMMDDHHMMSS
-                    # Convert to unix timestamp
-                    dt = datetime.strptime(date_part, "%Y%m%d%H%M%S")
-                    ts = dt.timestamp()
-                    
+                    m = _VIOL_TS_RE.match(name)
+                    if not m:
+                        continue
+                    y, mo, d, h, mi, s = map(int, m.groups())
+                    ts = datetime(y, mo, d, h, mi, s).timestamp()
+
                     if now - ts > max_age_seconds:
                         to_remove.append(f"{folder}/{name}")
                 except Exception:
-                    # If format doesn't match or other error, skip
+                    # Bad date digits or other error, skip
                     pass
             
             if to_remove:
@@ -0,0 +1,155 @@
+"""
+    Numba-accelerated fork of sort.py. The IoU matrix is computed by an
+    @njit kernel with an explicit parallel loop instead of broadcast
+    temporaries; the Hungarian assignment stays outside the jit (lap/scipy
+    are already C). Falls back to the NumPy implementation when numba is
+    not installed, so this module is always safe to import.
+"""
+from __future__ import print_function
+
+import numpy as np
+
+from .sort import (KalmanBoxTracker, linear_assignment,
+                   iou_batch as _iou_batch_numpy)
+
+try:
+  from numba import njit, prange
+  NUMBA_AVAILABLE = True
+except ImportError:
+  NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+  @njit(cache=True, fastmath=True, parallel=True)
+  def _iou_batch_jit(bb_test, bb_gt):
+    n = bb_test.shape[0]
+    m = bb_gt.shape[0]
+    o = np.empty((n, m))
+    for i in prange(n):
+      area_t = (bb_test[i, 2] - bb_test[i, 0]) * (bb_test[i, 3] - bb_test[i, 1])
+      for j in range(m):
+        xx1 = max(bb_test[i, 0], bb_gt[j, 0])
+        yy1 = max(bb_test[i, 1], bb_gt[j, 1])
+        xx2 = min(bb_test[i, 2], bb_gt[j, 2])
+        yy2 = min(bb_test[i, 3], bb_gt[j, 3])
+        w = max(0., xx2 - xx1)
+        h = max(0., yy2 - yy1)
+        wh = w * h
+        area_g = (bb_gt[j, 2] - bb_gt[j, 0]) * (bb_gt[j, 3] - bb_gt[j, 1])
+        o[i, j] = wh / (area_t + area_g - wh)
+    return o
+
+  def iou_batch(bb_test, bb_gt):
+    """
+    Computes IOU between two sets of bboxes in the form [x1,y1,x2,y2,...]
+    """
+    bb_test = np.ascontiguousarray(np.asarray(bb_test, dtype=np.float64).reshape(-1, 5)[:, :4])
+    bb_gt = np.ascontiguousarray(np.asarray(bb_gt, dtype=np.float64).reshape(-1, 5)[:, :4])
+    return _iou_batch_jit(bb_test, bb_gt)
+else:
+  iou_batch = _iou_batch_numpy
+
+
+def associate_detections_to_trackers(detections, trackers, iou_threshold=0.3):
+  """
+  Assigns detections to tracked object (both represented as bounding boxes)
+
+  Returns 3 lists of matches, unmatched_detections and unmatched_trackers
+  """
+  if(len(trackers)==0):
+    return np.empty((0,2),dtype=int), np.arange(len(detections)), np.empty((0,5),dtype=int)
+
+  iou_matrix = iou_batch(detections, trackers)
+
+  if min(iou_matrix.shape) > 0:
+    a = (iou_matrix > iou_threshold).astype(np.int32)
+    if a.sum(1).max() == 1 and a.sum(0).max() == 1:
+        matched_indices = np.stack(np.where(a), axis=1)
+    else:
+      matched_indices = linear_assignment(-iou_matrix)
+  else:
+    matched_indices = np.empty(shape=(0,2))
+
+  unmatched_detections = []
+  for d, det in enumerate(detections):
+    if(d not in matched_indices[:,0]):
+      unmatched_detections.append(d)
+  unmatched_trackers = []
+  for t, trk in enumerate(trackers):
+    if(t not in matched_indices[:,1]):
+      unmatched_trackers.append(t)
+
+  #filter out matched with low IOU
+  matches = []
+  for m in matched_indices:
+    if(iou_matrix[m[0], m[1]]<iou_threshold):
+      unmatched_detections.append(m[0])
+      unmatched_trackers.append(m[1])
+    else:
+      matches.append(m.reshape(1,2))
+  if(len(matches)==0):
+    matches = np.empty((0,2),dtype=int)
+  else:
+    matches = np.concatenate(matches,axis=0)
+
+  return matches, np.array(unmatched_detections), np.array(unmatched_trackers)
+
+
+class Sort(object):
+  def __init__(self, max_age=1, min_hits=3, iou_threshold=0.3):
+    """
+    Sets key parameters for SORT
+    """
+    self.max_age = max_age
+    self.min_hits = min_hits
+    self.iou_threshold = iou_threshold
+    self.trackers = []
+    self.frame_count = 0
+    if NUMBA_AVAILABLE:
+      # warm the jit cache so the first real frame doesn't pay compilation
+      iou_batch(np.zeros((1, 5)), np.zeros((1, 5)))
+
+  def update(self, dets=np.empty((0, 5))):
+    """
+    Params:
+      dets - a numpy array of detections in the format [[x1,y1,x2,y2,score],[x1,y1,x2,y2,score],...]
+    Requires: this method must be called once for each frame even with empty detections (use np.empty((0, 5)) for frames without detections).
+    Returns the a similar array, where the last column is the object ID.
+
+    NOTE: The number of objects returned may differ from the number of detections provided.
+    """
+    self.frame_count += 1
+    # get predicted locations from existing trackers.
+    trks = np.zeros((len(self.trackers), 5))
+    to_del = []
+    ret = []
+    for t, trk in enumerate(trks):
+      pos = self.trackers[t].predict()[0]
+      trk[:] = [pos[0], pos[1], pos[2], pos[3], 0]
+      if np.any(np.isnan(pos)):
+        to_del.append(t)
+    trks = np.ma.compress_rows(np.ma.masked_invalid(trks))
+    for t in reversed(to_del):
+      self.trackers.pop(t)
+    matched, unmatched_dets, unmatched_trks = associate_detections_to_trackers(dets,trks, self.iou_threshold)
+
+    # update matched trackers with assigned detections
+    for m in matched:
+      self.trackers[m[1]].update(dets[m[0], :])
+
+    # create and initialise new trackers for unmatched detections
+    for i in unmatched_dets:
+        trk = KalmanBoxTracker(dets[i,:])
+        self.trackers.append(trk)
+    i = len(self.trackers)
+    for trk in reversed(self.trackers):
+        d = trk.get_state()[0]
+        if (trk.time_since_update < 1) and (trk.hit_streak >= self.min_hits or self.frame_count <= self.min_hits):
+          ret.append(np.concatenate((d,[trk.id+1])).reshape(1,-1)) # +1 as MOT benchmark requires positive
+        i -= 1
+        # remove dead tracklet
+        if(trk.time_since_update > self.max_age):
+          self.trackers.pop(i)
+    if(len(ret)>0):
+      return np.concatenate(ret)
+    return np.empty((0,5))
@@ -4,8 +4,37 @@ Ensures all required configuration is present before startup.
 """
 
 import os
+import stat as _stat
 from typing import List, Tuple
-from pathlib import Path
+
+
+# Hashed O(1) membership instead of rebuilding and scanning a list per
+# call; the error-message join is likewise done once
+_VALID_VIDEO_EXT = frozenset({'.mp4', '.avi', '.mov', '.mkv', '.flv'})
+_VALID_VIDEO_EXT_MSG = ', '.join(sorted(_VALID_VIDEO_EXT))
+_VALID_MODEL_EXT = frozenset({'.pt', '.pth', '.onnx', '.engine'})
+
+# Stream schemes OpenCV can open directly; one C-level startswith pass
+# classifies them all, and new schemes only need a tuple entry
+_STREAM_SCHEMES = ("rtsp://", "rtmp://", "http://", "https://")
+
+
+# The worker's .env is loaded lazily by SupabaseService, which is
+# constructed after startup validation — so validation must pull it in
+# itself (once) or it would judge a pre-dotenv environment
+_dotenv_loaded = False
+
+
+def _ensure_dotenv():
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        try:
+            from dotenv import load_dotenv
+            load_dotenv(os.path.join(
+                os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
+        except ImportError:
+            pass
+        _dotenv_loaded = True
 
 
 class ValidationError(Exception):
@@ -16,31 +45,33 @@ class ValidationError(Exception):
 class EnvValidator:
     """Validates required environment variables and configuration."""
     
-    REQUIRED_ENV_VARS = [
+    REQUIRED_ENV_VARS = (
         "SUPABASE_URL",
         "SUPABASE_KEY"
-    ]
-    
+    )
+
     @staticmethod
     def validate_env_vars() -> Tuple[bool, List[str]]:
         """
         Validate that all required environment variables are set.
-        
+
         Returns:
             Tuple of (is_valid, list_of_errors)
         """
-        errors = []
-        
-        for var in EnvValidator.REQUIRED_ENV_VARS:
-            value = os.getenv(var)
-            if not value or value.strip() == "":
-                errors.append(f"Missing required environment variable: {var}")
-        
+        _ensure_dotenv()
+
+        # Bind environ once; each os.getenv is a fresh lookup and the
+        # URL was previously fetched twice
+        env = os.environ
+        errors = [f"Missing required environment variable: {var}"
+                  for var in EnvValidator.REQUIRED_ENV_VARS
+                  if not env.get(var, "").strip()]
+
         # Validate Supabase URL format
-        supabase_url = os.getenv("SUPABASE_URL", "")
+        supabase_url = env.get("SUPABASE_URL", "")
         if supabase_url and not supabase_url.startswith("https://"):
             errors.append("SUPABASE_URL must start with 'https://'")
-        
+
         return (len(errors) == 0, errors)
     
     @staticmethod
@@ -54,22 +85,26 @@ class EnvValidator:
         Returns:
             Tuple of (is_valid, error_message)
         """
-        # Check if it's an RTSP stream
-        if video_source.startswith("rtsp://"):
+        # Network streams (RTSP/RTMP/HLS) skip the file checks
+        if video_source.startswith(_STREAM_SCHEMES):
             return (True, "")
         
-        # Check if it's a file path
-        video_path = Path(video_source)
-        if not video_path.exists():
+        # Check if it's a file path — one stat covers exists + is_file,
+        # where exists()/is_file() each issued their own syscall
+        try:
+            st = os.stat(video_source)
+        except FileNotFoundError:
             return (False, f"Video file not found: {video_source}")
-        
-        if not video_path.is_file():
+        except OSError as e:
+            return (False, f"Cannot access video source {video_source}: {e}")
+
+        if not _stat.S_ISREG(st.st_mode):
             return (False, f"Video source is not a file: {video_source}")
-        
+
         # Check file extension
-        valid_extensions = ['.mp4', '.avi', '.mov', '.mkv', '.flv']
-        if video_path.suffix.lower() not in valid_extensions:
-            return (False, f"Unsupported video format: {video_path.suffix}. Supported: {', '.join(valid_extensions)}")
+        ext = os.path.splitext(video_source)[1]
+        if ext.lower() not in _VALID_VIDEO_EXT:
+            return (False, f"Unsupported video format: {ext}. Supported: {_VALID_VIDEO_EXT_MSG}")
         
         return (True, "")
     
@@ -85,17 +120,20 @@ class EnvValidator:
         Returns:
             Tuple of (is_valid, error_message)
         """
-        model_file = Path(model_path)
-        
-        if not model_file.exists():
+        try:
+            st = os.stat(model_path)
+        except FileNotFoundError:
             return (False, f"{model_name} not found at: {model_path}")
-        
-        if not model_file.is_file():
+        except OSError as e:
+            return (False, f"Cannot access {model_name} at {model_path}: {e}")
+
+        if not _stat.S_ISREG(st.st_mode):
             return (False, f"{model_name} path is not a file: {model_path}")
-        
+
         # Check file extension
-        if model_file.suffix.lower() not in ['.pt', '.pth', '.onnx']:
-            return (False, f"{model_name} has invalid extension: {model_file.suffix}")
+        ext = os.path.splitext(model_path)[1]
+        if ext.lower() not in _VALID_MODEL_EXT:
+            return (False, f"{model_name} has invalid extension: {ext}")
         
         return (True, "")
     
@@ -111,62 +149,73 @@ class EnvValidator:
         Returns:
             Tuple of (is_valid, error_message)
         """
-        if not (-90 <= latitude <= 90):
+        # abs() folds each two-sided range test into one compare
+        if abs(latitude) > 90.0:
             return (False, f"Invalid latitude: {latitude}. Must be between -90 and 90")
-        
-        if not (-180 <= longitude <= 180):
+
+        if abs(longitude) > 180.0:
             return (False, f"Invalid longitude: {longitude}. Must be between -180 and 180")
-        
+
         return (True, "")
     
     @staticmethod
-    def validate_all(config_module) -> None:
+    def validate_all(config_module, fail_fast: bool = False) -> None:
         """
         Validate all configuration settings.
         Raises ValidationError if any validation fails.
-        
+
         Args:
             config_module: The config module to validate
+            fail_fast: Raise on the first fatal error instead of running
+                the remaining (stat-issuing) checks
         """
         all_errors = []
-        
+
+        def _fail(err):
+            if fail_fast:
+                raise ValidationError(
+                    f"\n❌ Configuration Validation Failed:\n  - {err}")
+            all_errors.append(err)
+
         # 1. Environment variables
         env_valid, env_errors = EnvValidator.validate_env_vars()
         if not env_valid:
-            all_errors.extend(env_errors)
-        
+            for err in env_errors:
+                _fail(err)
+
         # 2. Video source
         video_valid, video_error = EnvValidator.validate_video_source(config_module.VIDEO_SOURCE)
         if not video_valid:
-            all_errors.append(video_error)
-        
+            _fail(video_error)
+
         # 3. Model paths
         coco_valid, coco_error = EnvValidator.validate_model_path(
-            config_module.COCO_MODEL_PATH, 
+            config_module.COCO_MODEL_PATH,
             "COCO Model (yolov8n.pt)"
         )
         if not coco_valid:
-            all_errors.append(coco_error)
-        
+            _fail(coco_error)
+
         lp_valid, lp_error = EnvValidator.validate_model_path(
             config_module.LP_MODEL_PATH,
             "License Plate Model"
         )
         if not lp_valid:
+            # Non-fatal: the worker runs without plate detection
             all_errors.append(f"WARNING: {lp_error}")
-        
+
         # 4. Coordinates
         coord_valid, coord_error = EnvValidator.validate_coordinates(
             config_module.LATITUDE,
             config_module.LONGITUDE
         )
         if not coord_valid:
-            all_errors.append(coord_error)
-        
+            _fail(coord_error)
+
         # 5. Junction ID
         if config_module.JUNCTION_ID <= 0:
-            all_errors.append(f"Invalid JUNCTION_ID: {config_module.JUNCTION_ID}. Must be positive integer")
-        
+            _fail(f"Invalid JUNCTION_ID: {config_module.JUNCTION_ID}. Must be positive integer")
+
         # Raise error if any validation failed
         if all_errors:
             error_msg = "\n❌ Configuration Validation Failed:\n" + "\n".join(f"  - {err}" for err in all_errors)
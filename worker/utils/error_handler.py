@@ -42,39 +42,50 @@ def retry_on_failure(
             pass
     """
     def decorator(func: Callable) -> Callable:
+        if max_retries <= 0:
+            # Nothing to retry: skip the wrapper (and its try/except)
+            return func
+
+        # Computed once at decoration: the retry path indexes a delay
+        # instead of multiplying, and failure messages don't re-read
+        # func.__name__ each attempt
+        delays = [delay * (backoff ** i) for i in range(max_retries)]
+        fname = func.__name__
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs) -> Any:
-            current_delay = delay
-            last_exception = None
-            
-            for attempt in range(max_retries + 1):
+            warn = logger.warning if logger else None
+            attempt = 0
+
+            while True:
                 try:
                     return func(*args, **kwargs)
                 except exceptions as e:
-                    last_exception = e
-                    
-                    if attempt < max_retries:
-                        if logger:
-                            logger.warning(
-                                f"Attempt {attempt + 1}/{max_retries} failed for {func.__name__}: {str(e)}. "
-                                f"Retrying in {current_delay:.1f}s..."
-                            )
-                        else:
-                            print(f"[RETRY] {func.__name__} failed, retrying in {current_delay:.1f}s...")
-                        
-                        time.sleep(current_delay)
-                        current_delay *= backoff
-                    else:
+                    if attempt >= max_retries:
                         if logger:
                             logger.error(
-                                f"All {max_retries} retry attempts failed for {func.__name__}: {str(e)}"
+                                "All %d retry attempts failed for %s: %s",
+                                max_retries, fname, e
                             )
                         else:
-                            print(f"[ERROR] All retries failed for {func.__name__}")
-            
-            # All retries exhausted
-            raise last_exception
-        
+                            print(f"[ERROR] All retries failed for {fname}")
+                        # Bare raise: original traceback, no rebinding
+                        raise
+
+                    wait = delays[attempt]
+                    if warn:
+                        # %-args defer formatting until the record is
+                        # actually emitted
+                        warn(
+                            "Attempt %d/%d failed for %s: %s. Retrying in %.1fs...",
+                            attempt + 1, max_retries, fname, e, wait
+                        )
+                    else:
+                        print(f"[RETRY] {fname} failed, retrying in {wait:.1f}s...")
+
+                    time.sleep(wait)
+                    attempt += 1
+
         return wrapper
     return decorator
 
@@ -109,12 +120,39 @@ def safe_execute(
         return func()
     except Exception as e:
         if logger:
-            logger.error(f"{error_message}: {str(e)}")
+            logger.error("%s: %s", error_message, e)
         else:
-            print(f"[ERROR] {error_message}: {str(e)}")
+            print(f"[ERROR] {error_message}: {e}")
         return default_return
 
 
+def make_safe_executor(logger: Optional[logging.Logger] = None) -> Callable:
+    """
+    Build a reusable safe_execute with the log target resolved once.
+
+    For per-frame call sites this skips re-branching on logger and the
+    logger.error attribute chain on every swallowed exception, and only
+    formats the message when the record would actually be emitted.
+
+    Example:
+        safe_call = make_safe_executor(logger)
+        result = safe_call(lambda: risky_operation(), default=[],
+                           error_message="Failed to fetch data")
+    """
+    log_err = logger.error if logger else (lambda msg: print(f"[ERROR] {msg}"))
+
+    def safe_call(func: Callable, default: Any = None,
+                  error_message: str = "Operation failed") -> Any:
+        try:
+            return func()
+        except Exception as e:
+            if logger is None or logger.isEnabledFor(logging.ERROR):
+                log_err(f"{error_message}: {e}")
+            return default
+
+    return safe_call
+
+
 class ErrorHandler:
     """Centralized error handling for worker operations."""
     
@@ -128,6 +166,18 @@ class ErrorHandler:
         self.logger = logger
         self.error_count = 0
         self.error_threshold = 10  # Stop after this many consecutive errors
+
+        # Log targets resolved once: the handle_* methods become one
+        # call plus counter work instead of branching on self.logger
+        # and walking the attribute chain per error
+        if logger:
+            self._err = logger.error
+            self._warn = logger.warning
+            self._crit = logger.critical
+        else:
+            self._err = lambda m, *a: print(f"[ERROR] {m % a if a else m}")
+            self._warn = lambda m, *a: print(f"[WARNING] {m % a if a else m}")
+            self._crit = lambda m, *a: print(f"[CRITICAL] {m % a if a else m}")
     
     def handle_video_error(self, error: Exception, video_source: str) -> bool:
         """
@@ -141,22 +191,14 @@ class ErrorHandler:
             True if should continue, False if should stop
         """
         self.error_count += 1
-        
-        if self.logger:
-            self.logger.error(f"Video capture error from {video_source}: {str(error)}")
-        else:
-            print(f"[ERROR] Video capture failed: {str(error)}")
-        
+
+        self._err("Video capture error from %s: %s", video_source, error)
+
         # Stop if too many consecutive errors
         if self.error_count >= self.error_threshold:
-            if self.logger:
-                self.logger.critical(
-                    f"Too many consecutive errors ({self.error_count}). Stopping worker."
-                )
-            else:
-                print(f"[CRITICAL] Too many errors. Stopping.")
+            self._crit("Too many consecutive errors (%d). Stopping worker.", self.error_count)
             return False
-        
+
         return True
     
     def handle_model_error(self, error: Exception, model_name: str) -> bool:
@@ -170,11 +212,8 @@ class ErrorHandler:
         Returns:
             True if should continue (skip frame), False if fatal
         """
-        if self.logger:
-            self.logger.warning(f"Model {model_name} inference error: {str(error)}")
-        else:
-            print(f"[WARNING] Model error: {str(error)}")
-        
+        self._warn("Model %s inference error: %s", model_name, error)
+
         # Model errors are usually recoverable (skip frame)
         return True
     
@@ -189,11 +228,8 @@ class ErrorHandler:
         Returns:
             True if should continue, False if fatal
         """
-        if self.logger:
-            self.logger.error(f"Database error during {operation}: {str(error)}")
-        else:
-            print(f"[ERROR] Database error: {str(error)}")
-        
+        self._err("Database error during %s: %s", operation, error)
+
         # Database errors are recoverable (data will sync on next interval)
         return True
     
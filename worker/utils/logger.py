@@ -3,12 +3,27 @@ Structured logging system for worker nodes.
 Replaces print statements with proper logging framework.
 """
 
+import atexit
 import logging
+import logging.handlers
 import sys
+import threading
+import time
 from pathlib import Path
-from datetime import datetime
+from queue import SimpleQueue
 from typing import Optional
 
+# Guards logger construction; cache hits never take it
+_LOGGER_LOCK = threading.Lock()
+
+# Formatters are stateless and thread-safe; share two singletons
+# instead of building a pair per logger
+_DETAILED_FMT = logging.Formatter(
+    fmt='%(asctime)s | %(levelname)-8s | %(name)s | %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+_SIMPLE_FMT = logging.Formatter(fmt='[%(levelname)s] %(message)s')
+
 
 class WorkerLogger:
     """Centralized logging for worker nodes."""
@@ -38,32 +53,40 @@ class WorkerLogger:
         """
         # Create unique logger key
         logger_key = f"{name}_{junction_id}" if junction_id else name
-        
-        # Return existing logger if already configured
-        if logger_key in WorkerLogger._loggers:
-            return WorkerLogger._loggers[logger_key]
-        
+
+        # Return existing logger if already configured — one .get()
+        # instead of a contains + getitem pair
+        cached = WorkerLogger._loggers.get(logger_key)
+        if cached is not None:
+            return cached
+
+        with _LOGGER_LOCK:
+            # Re-check: another thread may have built it while we waited,
+            # and double construction would duplicate handlers
+            cached = WorkerLogger._loggers.get(logger_key)
+            if cached is not None:
+                return cached
+            return WorkerLogger._build_logger(
+                logger_key, junction_id, name, log_level, log_to_file, log_dir)
+
+    @staticmethod
+    def _build_logger(logger_key, junction_id, name, log_level, log_to_file, log_dir) -> logging.Logger:
+        """Construct and cache a logger; callers hold _LOGGER_LOCK."""
         # Create new logger
         logger = logging.getLogger(logger_key)
         logger.setLevel(getattr(logging, log_level.upper()))
         
         # Remove existing handlers to avoid duplicates
         logger.handlers.clear()
-        
-        # Create formatters
-        detailed_formatter = logging.Formatter(
-            fmt='%(asctime)s | %(levelname)-8s | %(name)s | %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
-        
-        simple_formatter = logging.Formatter(
-            fmt='[%(levelname)s] %(message)s'
-        )
-        
+
+        # These loggers own their handlers; don't also bubble records up
+        # to the root logger (double emission when the app configures it)
+        logger.propagate = False
+
         # Console handler (stdout)
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setLevel(logging.INFO)
-        console_handler.setFormatter(simple_formatter)
+        console_handler.setFormatter(_SIMPLE_FMT)
         logger.addHandler(console_handler)
         
         # File handler (if enabled)
@@ -72,20 +95,45 @@ class WorkerLogger:
             log_path = Path(log_dir)
             log_path.mkdir(exist_ok=True)
             
-            # Create log filename with timestamp and junction ID
-            timestamp = datetime.now().strftime("%Y%m%d")
+            # Create log filename with timestamp and junction ID.
+            # time.strftime skips materializing a datetime object; the
+            # date is only stamped into the filename at logger creation
+            timestamp = time.strftime("%Y%m%d")
             if junction_id:
                 log_filename = f"junction_{junction_id}_{timestamp}.log"
             else:
                 log_filename = f"{name}_{timestamp}.log"
             
-            file_handler = logging.FileHandler(
+            # Rotation bounds disk usage for long-running workers
+            file_handler = logging.handlers.RotatingFileHandler(
                 log_path / log_filename,
+                maxBytes=10 * 1024 * 1024,
+                backupCount=5,
                 encoding='utf-8'
             )
             file_handler.setLevel(logging.DEBUG)
-            file_handler.setFormatter(detailed_formatter)
-            logger.addHandler(file_handler)
+            file_handler.setFormatter(_DETAILED_FMT)
+
+            # Disk writes happen on the listener's own thread; a log
+            # call from the frame loop only pays a queue put. Console
+            # output above stays synchronous for immediate visibility.
+            q = SimpleQueue()
+            queue_handler = logging.handlers.QueueHandler(q)
+            queue_handler.setLevel(logging.DEBUG)
+            logger.addHandler(queue_handler)
+
+            listener = logging.handlers.QueueListener(
+                q, file_handler, respect_handler_level=True)
+            listener.start()
+            # Keep a reference and drain on exit so buffered records
+            # land; tolerate a listener someone already stopped
+            logger._worker_queue_listener = listener
+
+            def _stop_listener(listener=listener):
+                if listener._thread is not None:
+                    listener.stop()
+
+            atexit.register(_stop_listener)
         
         # Store logger
         WorkerLogger._loggers[logger_key] = logger
@@ -113,6 +161,30 @@ class WorkerLogger:
         )
 
 
+def bind_logger(logger: Optional[logging.Logger]) -> None:
+    """
+    Rebind the module-level debug/info/warning/error/critical helpers
+    straight to the given logger's methods (or prefixed print fallbacks).
+
+    After a single call at startup, call sites pay one global load per
+    log call instead of the if-logger branch and attribute walk inside
+    the default wrappers below.
+    """
+    mod = sys.modules[__name__]
+    if logger is None:
+        mod.debug = lambda msg: print(f"[DEBUG] {msg}")
+        mod.info = lambda msg: print(f"[INFO] {msg}")
+        mod.warning = lambda msg: print(f"[WARNING] {msg}")
+        mod.error = lambda msg: print(f"[ERROR] {msg}")
+        mod.critical = lambda msg: print(f"[CRITICAL] {msg}")
+    else:
+        mod.debug = logger.debug
+        mod.info = logger.info
+        mod.warning = logger.warning
+        mod.error = logger.error
+        mod.critical = logger.critical
+
+
 # Convenience functions for quick logging
 def debug(msg: str, logger: Optional[logging.Logger] = None):
     """Log debug message."""